@@ -2,10 +2,10 @@
 # ----------------------------------
 # A self‑contained Streamlit application that:
 #   • Crawls a target web application (HTML + linked JS/CSS) and captures live XHR/Fetch
-#     traffic via selenium‑wire.
+#     traffic via Playwright.
 #   • Safely stores each artifact to disk, percent‑encoding any non‑ASCII URL chars to
 #     avoid encoding errors (e.g., U+2011 in itsecgames.com).
-#   • Uses a local **Ollama** LLM (e.g., `gemma3:4b`) to generate a short security
+#   • Uses local **Ollama** LLMs (`llama3.2:3b`, `gemma3:4b`) to generate a short security
 #     summary for every text asset and, on demand, a deeper OWASP‑aligned analysis with
 #     recommended tests.
 #   • Lets users upload their own files (JS/CSS/HTML/JSON…) for the same treatment.
@@ -16,30 +16,49 @@
 #  Quick start
 # ────────────────────────────────────────────────────────────────────────────────
 #   python -m venv venv && source venv/bin/activate  # (Windows: venv\Scripts\activate)
-#   pip install streamlit selenium-wire beautifulsoup4 requests ollama-python
-#   # Ensure Chrome + matching chromedriver are on PATH, or set CHROMEDRIVER env var.
-#   ollama serve &          # make sure the local Ollama server is running
-#   ollama run gemma3:4b    # pull the model once (adjust name/version as needed)
+#   pip install streamlit playwright beautifulsoup4 lxml requests ollama-python
+#   playwright install chromium   # headless browser used for API capture
+#   OLLAMA_NUM_PARALLEL=4 ollama serve &   # local Ollama server, 4 concurrent requests
+#   ollama pull llama3.2:3b-instruct-q4_K_M   # short summaries
+#   ollama pull gemma3:4b   # deep dives (adjust names/versions as needed)
+#   ollama pull nomic-embed-text   # embeddings for the near-duplicate summary cache
 #   streamlit run web_security_analyzer_app.py
 #
 # ────────────────────────────────────────────────────────────────────────────────
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import os
+import re
+import shutil
 import textwrap
+import uuid
 import tempfile
 import pathlib
 import mimetypes
 import hashlib
-from dataclasses import dataclass
+import json
+import functools
+import queue
+import threading
+import time
+from collections import OrderedDict
+import concurrent.futures
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
 from typing import List, Optional
 from urllib.parse import urljoin
 
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup, SoupStrainer
 import streamlit as st
-from seleniumwire import webdriver
-from selenium.webdriver.chrome.options import Options
+from playwright.async_api import Browser, Playwright, Response, async_playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 import ollama  # local LLM client (pip install ollama-python)
 
 ###############################################################################
@@ -52,24 +71,107 @@ class FileArtifact:
     type: str                   # html | js | css | api_request | api_response | other
     url: str | None             # original source URL (None for uploads)
     content: str | bytes | None # raw data
-    summary: Optional[str] = None   # short security summary
     details: Optional[str] = None   # deep OWASP analysis
+    sha: str = ""                   # content fingerprint, computed once from memory
+    truncated: bool = False         # content is only the first MAX_ASSET_BYTES of the source
+    also_at: List[str] = field(default_factory=list)  # other URLs serving identical content
 
-    def hash(self) -> str:
-        return hashlib.sha1(self.path.read_bytes()).hexdigest()[:10]
+    def __post_init__(self):
+        if not self.sha and self.content is not None:
+            data = self.content.encode("utf-8", errors="replace") if isinstance(self.content, str) else self.content
+            if self.truncated:
+                # A capped head is not the file's identity: bundles sharing a long
+                # vendor prefix would collide, so the source URL is part of the key.
+                data = (self.url or "").encode() + b"\0" + data
+            self.sha = _short(data)
 
 ###############################################################################
 # Helper functions
 ###############################################################################
 
+FETCH_WORKERS = 12  # concurrent static-asset downloads (I/O bound)
+HTTP_POOL_SIZE = 32  # per-host keep-alive connections; comfortably above FETCH_WORKERS
+LLM_WORKERS = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))  # match Ollama's parallel slots
+SUMMARY_MODEL = "llama3.2:3b-instruct-q4_K_M"  # small Q4 model for the per-artifact pass
+DEEP_MODEL = "gemma3:4b"                      # larger model only for on-demand deep dives
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+KEEP_ALIVE = "30m"  # keep the model resident between calls instead of reloading weights
+EMBED_MODEL = "nomic-embed-text"
+SEMCACHE_THRESHOLD = 0.97   # cosine similarity at which two artifacts share a summary
+SEMCACHE_MAX_ENTRIES = 2048  # oldest entries are evicted beyond this
+# Per-user cache dir (0700), not the shared temp dir: other local users must not be
+# able to plant summaries or race the file writes.
+CACHE_DIR = pathlib.Path(os.getenv("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache") / "web-security-analyzer"
+SEMCACHE_PATH = CACHE_DIR / "semcache.npz"
+NETWORK_IDLE_TIMEOUT_MS = 10000  # upper bound on waiting for API traffic to settle
+CAPTURE_TIMEOUT_S = 120  # hard cap on one whole API capture (launch, load, bodies)
+MAX_ASSET_BYTES = 64 * 1024  # the LLM only ever sees the head of an asset
+PROMPT_TOKEN_BUDGET = 1500  # max tokens of artifact text sent to the LLM
+CHARS_PER_TOKEN = 4         # rough average for code; avoids shipping a tokenizer
+_ASSET_STRAINER = SoupStrainer(["script", "link"])  # only tags that reference assets
+_HTML_SEC_STRAINER = SoupStrainer(["script", "form", "input", "meta"])
+_API_CONTENT_TYPE = re.compile(r"application/(?:json|xml)|text/plain")  # captured API bodies
+# Security-relevant fragments of JS/CSS: URLs, string literals, named functions,
+# inline event handlers and dangerous sinks/sources.
+_SEC_PATTERNS = re.compile(
+    r"""\bhttps?://[^\s"'`<>)]+"""
+    r"""|"[^"\n]{4,}"|'[^'\n]{4,}'"""
+    r"""|\bfunction\s+\w+"""
+    r"""|\bon(?:click|dblclick|load|error|mouse\w+|key\w+|submit|change|focus|blur|input|message)\s*=(?!=)[^;\n]{0,80}"""
+    r"""|\b(?:eval|innerHTML|outerHTML|document\.write|fetch|XMLHttpRequest|postMessage"""
+    r"""|localStorage|sessionStorage)\b[^;\n]{0,80}"""
+)
+
+
+# One client = one pooled HTTP connection to Ollama for every generate/embed call,
+# kept across reruns. Resolved here, on the script thread, so worker threads
+# only ever see the plain object.
+@st.cache_resource(show_spinner=False)
+def _ollama_client() -> ollama.Client:
+    return ollama.Client(host=OLLAMA_HOST)
+
+
+_client = _ollama_client()
+
+
+def _short(b: bytes) -> str:
+    # 10-hex-char fingerprint for filenames and artifact ids; BLAKE2 is faster than sha1.
+    return hashlib.blake2b(b, digest_size=5).hexdigest()
+
+
 def _safe_write(path: pathlib.Path, text: str):
     path.write_text(text, encoding="utf-8", errors="replace")
 
 
+@functools.lru_cache(maxsize=4096)
 def _requote(url: str) -> str:
     return requests.utils.requote_uri(url)
 
 
+def _get_capped(sess: requests.Session, url: str) -> tuple[bytes, str, bool]:
+    # Stream the body and stop just past MAX_ASSET_BYTES instead of buffering it
+    # whole; the extra byte tells a capped asset apart from one of exactly that size.
+    with sess.get(url, stream=True, timeout=20) as r:
+        r.raise_for_status()
+        buf = bytearray()
+        for chunk in r.iter_content(chunk_size=8192):
+            buf.extend(chunk)
+            if len(buf) > MAX_ASSET_BYTES:
+                break
+        return bytes(buf[:MAX_ASSET_BYTES]), r.encoding or "utf-8", len(buf) > MAX_ASSET_BYTES
+
+
+def _make_session() -> requests.Session:
+    sess = requests.Session(); sess.headers["User-Agent"] = "Mozilla/5.0 (sec-analyzer)"
+    # Ignore Retry-After: urllib3 sleeps for it uncapped and outside the request
+    # timeout, so a hostile target could stall the crawl indefinitely.
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504],
+                  respect_retry_after_header=False)
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    sess.mount("http://", adapter); sess.mount("https://", adapter)
+    return sess
+
+
 def fetch_static(base: str, sess: requests.Session, tmp: pathlib.Path) -> List[FileArtifact]:
     arts: List[FileArtifact] = []
 
@@ -79,7 +181,8 @@ def fetch_static(base: str, sess: requests.Session, tmp: pathlib.Path) -> List[F
     idx = tmp / "index.html"; _safe_write(idx, html)
     arts.append(FileArtifact(idx, "html", base, html))
 
-    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer(["script", "link"]))
+    soup = BeautifulSoup(html, "lxml", parse_only=_ASSET_STRAINER)
+    assets: List[tuple[str, str]] = []
     for tag in soup:
         src = None; ftype = None
         if tag.name == "script" and tag.get("src"):
@@ -88,56 +191,321 @@ def fetch_static(base: str, sess: requests.Session, tmp: pathlib.Path) -> List[F
             src, ftype = tag["href"], "css"
         if not src:
             continue
-        full = _requote(urljoin(base, src))
-        try:
-            r = sess.get(full, timeout=20); r.raise_for_status()
-            fp = tmp / (hashlib.sha1(full.encode()).hexdigest()[:10] + ("." + ftype))
-            if ftype in {"js", "css", "html"}:
-                _safe_write(fp, r.text); arts.append(FileArtifact(fp, ftype, full, r.text))
-            else:
-                fp.write_bytes(r.content); arts.append(FileArtifact(fp, ftype, full, r.content))
-        except Exception as e:
-            st.warning(f"Failed {full}: {e}")
+        assets.append((_requote(urljoin(base, src)), ftype))
+
+    # Download concurrently; Streamlit calls stay on the script thread. Results are
+    # slotted by position so artifacts keep document order regardless of completion.
+    results: List[Optional[FileArtifact]] = [None] * len(assets)
+    errors: List[tuple[int, str]] = []
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+        futs = {ex.submit(_get_capped, sess, full): n for n, (full, _) in enumerate(assets)}
+        for fut in as_completed(futs):
+            n = futs[fut]; full, ftype = assets[n]
+            try:
+                raw, enc, cut = fut.result()
+                fp = tmp / (_short(full.encode()) + ("." + ftype))
+                if ftype in {"js", "css", "html"}:
+                    text = raw.decode(enc, errors="replace")
+                    _safe_write(fp, text); results[n] = FileArtifact(fp, ftype, full, text, truncated=cut)
+                else:
+                    fp.write_bytes(raw); results[n] = FileArtifact(fp, ftype, full, raw, truncated=cut)
+            except Exception as e:
+                errors.append((n, f"Failed {full}: {e}"))
+    arts.extend(a for a in results if a is not None)
+    for _, msg in sorted(errors):
+        st.warning(msg)
     return arts
 
 
-def capture_api(base: str, tmp: pathlib.Path) -> List[FileArtifact]:
-    opts = Options(); opts.add_argument("--headless=new"); opts.add_argument("--disable-gpu"); opts.add_argument("--no-sandbox")
-    drv = webdriver.Chrome(options=opts); drv.scopes = [r".*"]; drv.set_page_load_timeout(40)
+# Keeps one headless Chromium alive across crawls. Playwright objects are bound
+# to the event loop that created them, so the browser lives on its own loop thread
+# and each crawl is submitted to it.
+class BrowserHost:
+
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        self._lock: Optional[asyncio.Lock] = None  # created on self._loop in _ensure
+        self._pw: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+
+    async def _ensure(self) -> Browser:
+        if self._lock is None:  # only ever touched from the loop thread
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._pw is None:
+                    self._pw = await async_playwright().start()
+                self._browser = await self._pw.chromium.launch(
+                    headless=True, args=["--disable-gpu", "--no-sandbox"])
+            return self._browser
+
+    def run(self, fn, timeout: float = CAPTURE_TIMEOUT_S):
+        async def go():
+            return await fn(await self._ensure())
+        fut = asyncio.run_coroutine_threadsafe(go(), self._loop)
+        try:
+            return fut.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            fut.cancel()  # a hung Chromium must not block the script thread forever
+            raise TimeoutError(f"API capture did not finish within {timeout:.0f} s")
+
+    def close(self):
+        async def go():
+            if self._browser is not None: await self._browser.close()
+            if self._pw is not None: await self._pw.stop()
+        try: asyncio.run_coroutine_threadsafe(go(), self._loop).result(timeout=10)
+        except Exception: pass
+
+
+@st.cache_resource(show_spinner=False)
+def _browser_host() -> BrowserHost:
+    host = BrowserHost()
+    atexit.register(host.close)
+    return host
+
+
+async def _capture_api_async(browser: Browser, base: str, tmp: pathlib.Path) -> List[FileArtifact]:
     out: List[FileArtifact] = []
+    # A fresh context per crawl keeps cookies/storage isolated between targets.
+    context = await browser.new_context()
     try:
-        drv.get(_requote(base)); drv.implicitly_wait(8)
-        for rq in drv.requests:
-            if rq.response is None: continue
-            ct = rq.response.headers.get("Content-Type", "")
-            if not any(x in ct for x in ("application/json", "text/plain", "application/xml")):
+        page = await context.new_page()
+        responses: List[Response] = []
+        on_response = responses.append
+        page.on("response", on_response)
+        await page.goto(_requote(base), timeout=40000)
+        # Settle as soon as the network is idle (500 ms quiet), capped so pages that
+        # poll forever still return what was captured so far.
+        try: await page.wait_for_load_state("networkidle", timeout=NETWORK_IDLE_TIMEOUT_MS)
+        except PlaywrightTimeoutError: pass
+        # Stop recording before reading bodies: on pages that keep polling the list
+        # would otherwise grow while we await, undoing the time bound above.
+        page.remove_listener("response", on_response)
+        for r in list(responses):
+            ct = r.headers.get("content-type", "")
+            if not _API_CONTENT_TYPE.search(ct):
                 continue
-            try: body = rq.response.body.decode("utf-8", errors="replace")
-            except: body = "<binary payload>"
-            req_p = tmp / f"api_req_{hashlib.sha1(rq.url.encode()).hexdigest()[:8]}.txt"
-            _safe_write(req_p, f"{rq.method} {rq.url}\n\n{rq.headers}\n\n{rq.body or ''}")
-            out.append(FileArtifact(req_p, "api_request", rq.url, req_p.read_text()))
-            res_p = tmp / f"api_res_{hashlib.sha1(rq.url.encode()).hexdigest()[:8]}.txt"
+            rq = r.request
+            try:
+                raw = await r.body(); cut = len(raw) > MAX_ASSET_BYTES
+                body = raw[:MAX_ASSET_BYTES].decode("utf-8", errors="replace")
+            except Exception: body, cut = "<binary payload>", False
+            # all_headers() includes Cookie/Authorization, which Request.headers omits.
+            try: headers = "\n".join(f"{k}: {v}" for k, v in (await rq.all_headers()).items())
+            except Exception: headers = "\n".join(f"{k}: {v}" for k, v in rq.headers.items())
+            # post_data decodes strictly; binary bodies (protobuf, multipart) must not abort the capture.
+            post = (rq.post_data_buffer or b"").decode("utf-8", errors="replace")
+            req_p = tmp / f"api_req_{_short(rq.url.encode())}.txt"
+            dump = f"{rq.method} {rq.url}\n\n{headers}\n\n{post}"
+            _safe_write(req_p, dump)
+            out.append(FileArtifact(req_p, "api_request", rq.url, dump))
+            res_p = tmp / f"api_res_{_short(rq.url.encode())}.txt"
             _safe_write(res_p, body)
-            out.append(FileArtifact(res_p, "api_response", rq.url, body))
+            out.append(FileArtifact(res_p, "api_response", rq.url, body, truncated=cut))
     finally:
-        drv.quit()
+        await context.close()
     return out
 
 
-def short_summary(text: str, role: str) -> str:
+def capture_api(base: str, tmp: pathlib.Path) -> List[FileArtifact]:
+    return _browser_host().run(lambda browser: _capture_api_async(browser, base, tmp))
+
+
+# Near-duplicate prompt cache: reuse a stored answer when the embedding of a new
+# text is within SEMCACHE_THRESHOLD cosine of one seen before (same kind).
+class SemanticCache:
+
+    def __init__(self, path: pathlib.Path, threshold: float = SEMCACHE_THRESHOLD,
+                 max_entries: int = SEMCACHE_MAX_ENTRIES):
+        self.path, self.threshold, self.max_entries = path, threshold, max_entries
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._vecs = np.empty((0, 0), dtype=np.float32)
+        self._kinds: List[str] = []
+        self._answers: List[str] = []
+        try:
+            with np.load(path) as z:
+                rows = [json.loads(line) for line in z["entries"].tobytes().decode("utf-8").splitlines()]
+                self._vecs = z["vecs"].astype(np.float32)
+                self._kinds, self._answers = [r["kind"] for r in rows], [r["answer"] for r in rows]
+        except Exception:
+            pass  # missing or unreadable cache file: start empty
+
+    @staticmethod
+    def embed(text: str) -> np.ndarray:
+        # Embed everything the LLM sees (the condensed body), so inputs that only
+        # share a head are not treated as near-duplicates.
+        prompt = text[:PROMPT_TOKEN_BUDGET * CHARS_PER_TOKEN]
+        v = np.asarray(_client.embeddings(model=EMBED_MODEL, prompt=prompt, keep_alive=KEEP_ALIVE)["embedding"], dtype=np.float32)
+        return v / (np.linalg.norm(v) or 1.0)
+
+    def get(self, kind: str, vec: np.ndarray) -> Optional[str]:
+        with self._lock:
+            if not self._answers or self._vecs.shape[1] != vec.shape[0]:
+                return None
+            sims = self._vecs @ vec
+            sims[[k != kind for k in self._kinds]] = -1.0
+            best = int(np.argmax(sims))
+            return self._answers[best] if sims[best] >= self.threshold else None
+
+    def put(self, kind: str, vec: np.ndarray, answer: str):
+        with self._lock:
+            if self._answers and self._vecs.shape[1] != vec.shape[0]:
+                # Embedding model changed; old vectors are not comparable.
+                self._vecs, self._kinds, self._answers = np.empty((0, 0), dtype=np.float32), [], []
+            self._vecs = np.vstack([self._vecs.reshape(-1, vec.shape[0]), vec])[-self.max_entries:]
+            self._kinds = (self._kinds + [kind])[-self.max_entries:]
+            self._answers = (self._answers + [answer])[-self.max_entries:]
+            self._dirty = True
+        self._persist()
+
+    def _persist(self):
+        # Write outside the lookup lock so LLM workers never wait on disk. A single
+        # writer at a time; puts that arrive meanwhile are folded into its next pass.
+        if not self._save_lock.acquire(blocking=False):
+            return
+        while True:
+            with self._lock:
+                if not self._dirty:
+                    self._save_lock.release()
+                    return
+                self._dirty = False
+                vecs, kinds, answers = self._vecs, list(self._kinds), list(self._answers)
+            # Answers as JSON lines, not a fixed-width unicode array padded to the
+            # longest answer.
+            entries = "".join(json.dumps({"kind": k, "answer": a}) + "\n" for k, a in zip(kinds, answers))
+            tmp: Optional[str] = None
+            try:
+                fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".npz")
+                with os.fdopen(fd, "wb") as f:
+                    np.savez(f, vecs=vecs, entries=np.frombuffer(entries.encode("utf-8"), dtype=np.uint8))
+                os.replace(tmp, self.path)
+            except Exception:
+                if tmp: pathlib.Path(tmp).unlink(missing_ok=True)  # cache stays valid in memory
+
+
+@st.cache_resource(show_spinner=False)
+def _semantic_cache() -> SemanticCache:
+    CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    os.chmod(CACHE_DIR, 0o700)
+    return SemanticCache(SEMCACHE_PATH)
+
+
+def _semantic_generate(kind: str, text: str, generate) -> str:
+    # The cache is only an optimisation: if embedding or the cache itself fails
+    # (e.g. a read-only HOME), just generate.
+    cache = _semcache
+    if cache is None:
+        return generate()
+    try:
+        vec = SemanticCache.embed(text)
+        hit = cache.get(kind, vec)
+    except Exception:
+        return generate()
+    if hit is not None:
+        return hit
+    answer = generate()
+    try: cache.put(kind, vec, answer)
+    except Exception: pass
+    return answer
+
+
+def _condense(text: str, ftype: str, budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    # Fit the artifact into ~budget tokens, keeping the security-relevant parts of
+    # large JS/CSS/HTML rather than an arbitrary head slice.
+    limit = budget * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    if ftype in {"js", "css"}:
+        picked = "\n".join(dict.fromkeys(m.group(0) for m in _SEC_PATTERNS.finditer(text)))
+    elif ftype == "html":
+        picked = str(BeautifulSoup(text, "lxml", parse_only=_HTML_SEC_STRAINER))
+    else:
+        picked = ""
+    return (picked or text)[:limit]
+
+
+def _content_key(text: str, model: str) -> str:
+    return hashlib.blake2b(f"{model}\0{text}".encode("utf-8", errors="replace"), digest_size=32).hexdigest()
+
+
+# Exact-match response cache shared across reruns and sessions. Lookups happen
+# outside the generation call so a miss can still stream into the page.
+class ResponseCache:
+
+    def __init__(self, ttl: float = 24*60*60, max_entries: int = 512):
+        self.ttl, self.max_entries = ttl, max_entries
+        self._lock = threading.Lock()
+        self._items: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or time.monotonic() - item[0] > self.ttl:
+                return None
+            self._items.move_to_end(key)
+            return item[1]
+
+    def put(self, key: str, answer: str):
+        with self._lock:
+            self._items[key] = (time.monotonic(), answer)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+@st.cache_resource(show_spinner=False)
+def _response_cache() -> ResponseCache:
+    return ResponseCache()
+
+
+# Like _client, both caches are resolved here on the script thread; summary
+# workers only ever use the plain objects.
+_responses = _response_cache()
+try: _semcache: Optional[SemanticCache] = _semantic_cache()
+except Exception: _semcache = None  # e.g. a read-only HOME: run without the semantic cache
+
+
+def _stream_generate(model: str, prompt: str, options: dict, placeholder=None) -> str:
+    # Render tokens as they arrive when a Streamlit placeholder is given.
+    acc: List[str] = []
+    for chunk in _client.generate(model=model, prompt=prompt, stream=True,
+                                  keep_alive=KEEP_ALIVE, options=options):
+        acc.append(chunk["response"])
+        if placeholder is not None:
+            placeholder.markdown("".join(acc))
+    return "".join(acc).strip()
+
+
+def _llm(model: str, kind: str, text: str, prompt: str, options: dict, placeholder=None) -> str:
+    # Exact hash hit -> semantic near-duplicate hit -> generate. Exceptions
+    # propagate, so LLM errors are never cached.
+    key = _content_key(f"{kind}\0{text}", model)
+    answer = _responses.get(key)
+    if answer is None:
+        answer = _semantic_generate(f"{kind}:{model}", text,
+                                    lambda: _stream_generate(model, prompt, options, placeholder))
+        _responses.put(key, answer)
+    return answer
+
+
+def short_summary(text: str, role: str, placeholder=None) -> str:
+    body = _condense(text, role)
     prompt = (
         "You are a senior application security tester. Provide a ≤120‑word, "
         f"bullet‑friendly security summary of the following {role}, highlighting potential vulnerabilities."
     )
     try:
-        return ollama.generate(model="gemma3:4b", prompt=prompt+"\n\n"+text[:12000], stream=False,
-                               options={"temperature":0.2,"max_tokens":300})["response"].strip()
+        return _llm(SUMMARY_MODEL, f"summary:{role}", body, prompt+"\n\n"+body,
+                    {"temperature":0.2,"max_tokens":300}, placeholder)
     except Exception as e:
         return f"[LLM error: {e}]"
 
 
-def deep_dive(text: str, ftype: str) -> str:
+def deep_dive(text: str, ftype: str, placeholder=None) -> str:
+    body = _condense(text, ftype)
     prompt = textwrap.dedent(f"""
         You are an expert pentester using the OWASP Web Security Testing Guide.
         Analyse the following {ftype} file and produce:
@@ -147,23 +515,65 @@ def deep_dive(text: str, ftype: str) -> str:
           • Manual or automated tests to confirm each finding
         Limit to 500 words and quote only relevant lines.
         --- BEGIN ---
-        {text[:12000]}
+        {body}
         --- END ---
     """)
     try:
-        return ollama.generate(model="gemma3:4b", prompt=prompt, stream=False,
-                               options={"temperature":0.1,"max_tokens":700})["response"].strip()
+        return _llm(DEEP_MODEL, f"deep:{ftype}", body, prompt,
+                    {"temperature":0.1,"max_tokens":700}, placeholder)
     except Exception as e:
         return f"[LLM error: {e}]"
 
+
+def _warm_up():
+    # Load the model into memory ahead of the first summary; failures surface later.
+    try:
+        _client.generate(model=SUMMARY_MODEL, prompt="hi", keep_alive=KEEP_ALIVE, options={"num_predict": 1})
+    except Exception:
+        pass
+
 ###############################################################################
 # Streamlit UI
 ###############################################################################
 
+def _work_dir(kind: str) -> pathlib.Path:
+    # One temp root per session (removed at exit); each crawl/upload batch gets a subdir.
+    if "tmp_root" not in st.session_state:
+        st.session_state.tmp_root = pathlib.Path(tempfile.mkdtemp(prefix="sec_"))
+        atexit.register(shutil.rmtree, st.session_state.tmp_root, ignore_errors=True)
+    d = st.session_state.tmp_root / f"{kind}_{uuid.uuid4().hex[:8]}"
+    d.mkdir()
+    return d
+
+
+class _QueuedPlaceholder:
+    # Stand-in for st.empty() inside worker threads: Streamlit elements can only be
+    # updated from the script thread, so partial text is queued for it to render.
+    def __init__(self, q: queue.Queue, key: str):
+        self.q, self.key = q, key
+
+    def markdown(self, text: str):
+        self.q.put((self.key, text))
+
+
+def _add_artifacts(new: List[FileArtifact]):
+    # Exact duplicates (same vendor bundle under several URLs, re-uploads on
+    # rerun) alias the first copy instead of being stored and summarized again;
+    # their URLs are kept on it, since the same code on another host matters.
+    for a in new:
+        kept = st.session_state.arts.setdefault(a.sha, a)
+        if kept is not a and a.url and a.url != kept.url and a.url not in kept.also_at:
+            kept.also_at.append(a.url)
+
+
 def main():
     st.set_page_config(page_title="Web Security Analyzer", layout="wide")
     st.title("🔍 Web Security Analyzer & Summarizer")
 
+    if "warmed" not in st.session_state:
+        st.session_state.warmed = True
+        threading.Thread(target=_warm_up, daemon=True).start()
+
     with st.sidebar:
         st.header("Crawl Target")
         url = st.text_input("URL of web application:")
@@ -171,58 +581,103 @@ def main():
         st.markdown("---")
         uploads = st.file_uploader("Or upload files for analysis", accept_multiple_files=True)
 
-    if "arts" not in st.session_state:
-        st.session_state.arts: List[FileArtifact] = []
+    # Artifacts and their short summaries, both keyed by content sha, so each
+    # unique file is stored and summarized once per session.
+    arts: dict[str, FileArtifact] = st.session_state.setdefault("arts", {})
+    summaries: dict[str, str] = st.session_state.setdefault("summaries", {})
 
-    # Handle uploads
+    # Handle uploads (the uploader hands back the same files on every rerun)
     if uploads:
-        up_dir = pathlib.Path(tempfile.mkdtemp(prefix="sec_up_"))
+        up_dir: Optional[pathlib.Path] = None
+        up_arts: List[FileArtifact] = []
         for uf in uploads:
-            p = up_dir / uf.name; p.write_bytes(uf.read())
+            raw = uf.read(); sha = _short(raw)
+            if sha in arts:
+                continue
+            up_dir = up_dir or _work_dir("up")
+            p = up_dir / uf.name; p.write_bytes(raw)
             mime = mimetypes.guess_type(uf.name)[0] or ""
             if "javascript" in mime or p.suffix.lower()==".js": t="js"
             elif "css" in mime or p.suffix.lower()==".css": t="css"
             elif "html" in mime or p.suffix.lower() in {".html",".htm"}: t="html"
             else: t="other"
-            c = p.read_text(errors="replace") if t!="other" else p.read_bytes()
-            st.session_state.arts.append(FileArtifact(p,t,None,c))
+            c = raw.decode("utf-8", errors="replace") if t!="other" else raw
+            up_arts.append(FileArtifact(p,t,None,c,sha=sha))
+        _add_artifacts(up_arts)
         uploads.clear()
 
     # Crawl
     if crawl_btn and url:
         with st.spinner("Crawling & capturing …"):
-            tmp = pathlib.Path(tempfile.mkdtemp(prefix="sec_crawl_"))
-            sess = requests.Session(); sess.headers["User-Agent"] = "Mozilla/5.0 (sec-analyzer)"
+            tmp = _work_dir("crawl")
+            sess = _make_session()
             try:
-                st.session_state.arts.extend(fetch_static(url, sess, tmp))
-                st.session_state.arts.extend(capture_api(url, tmp))
+                _add_artifacts(fetch_static(url, sess, tmp))
+                _add_artifacts(capture_api(url, tmp))
             except Exception as e:
                 st.error(f"Crawl failed: {e}")
 
-    # Summaries
-    for a in st.session_state.arts:
-        if a.summary is None and isinstance(a.content, str):
-            a.summary = short_summary(a.content, a.type)
+    # Summaries (run concurrently; Ollama serves OLLAMA_NUM_PARALLEL requests at once)
+    pending = [(sha, a) for sha, a in arts.items() if sha not in summaries and isinstance(a.content, str)]
+    if pending:
+        bar = st.progress(0.0, text="Summarizing artifacts …")
+        live = st.container()
+        slots = {sha: live.empty() for sha, _ in pending}
+        names = {sha: a.path.name for sha, a in pending}
+        partial: queue.Queue = queue.Queue()
+
+        def drain():
+            latest = {}
+            while True:
+                try: sha, text = partial.get_nowait()
+                except queue.Empty: break
+                latest[sha] = text
+            for sha, text in latest.items():
+                slots[sha].markdown(f"**{names[sha]}** …\n\n{text}")
+
+        with ThreadPoolExecutor(max_workers=LLM_WORKERS) as ex:
+            futs = {ex.submit(short_summary, a.content, a.type, _QueuedPlaceholder(partial, sha)): sha
+                    for sha, a in pending}
+            remaining, done = set(futs), 0
+            while remaining:
+                finished, remaining = wait(remaining, timeout=0.2, return_when=FIRST_COMPLETED)
+                drain()
+                for fut in finished:
+                    sha = futs[fut]; summaries[sha] = fut.result(); slots[sha].empty()
+                    done += 1
+                    bar.progress(done / len(pending), text=f"Summarized {done}/{len(pending)}")
+        bar.empty()
 
     # ──────────────────────────────────────────
     # Report UI
     # ──────────────────────────────────────────
-    if not st.session_state.arts:
+    if not arts:
         st.info("Provide a URL or upload files to start.")
         return
 
     st.subheader("📄 Collected Artifacts")
-    for i, a in enumerate(st.session_state.arts):
-        with st.expander(f"{i+1}. [{a.type.upper()}] {a.path.name} ({a.hash()})"):
+    for i, (sha, a) in enumerate(arts.items()):
+        cut = " ✂" if a.truncated else ""
+        with st.expander(f"{i+1}. [{a.type.upper()}] {a.path.name} ({sha}){cut}"):
+            if a.truncated:
+                st.caption(f"✂ Truncated: only the first {MAX_ASSET_BYTES // 1024} KB were downloaded, "
+                           "analyzed and saved.")
+            if a.also_at:
+                st.caption("Identical content also served from: " + ", ".join(a.also_at))
             st.markdown("**Short Summary:**")
-            st.markdown(a.summary or "*Binary content – no summary*")
+            st.markdown(summaries.get(sha) or "*Binary content – no summary*")
             if isinstance(a.content, str):
-                if st.button(f"🔬 Deep‑Dive {i+1}", key=f"dd{i}"):
+                if st.button(f"🔬 Deep‑Dive {i+1}", key=f"dd{sha}"):
                     if a.details is None:
-                        with st.spinner("Generating deep dive …"):
-                            a.details = deep_dive(a.content, a.type)
-                    st.markdown(a.details)
-            st.download_button("⬇ Download", data=a.path.read_bytes(), file_name=a.path.name)
+                        out = st.empty(); out.markdown("*Generating deep dive …*")
+                        a.details = deep_dive(a.content, a.type, out)
+                        out.markdown(a.details)
+                    else:
+                        st.markdown(a.details)
+            # Saved file mirrors a.content, so serve it from memory rather than disk.
+            data = a.content if a.content is not None else a.path.read_bytes()
+            st.download_button("⬇ Download", data=data, file_name=a.path.name,
+                               mime="application/octet-stream", key=f"dl{sha}")
 
 if __name__ == "__main__":
     main()